@@ -2,22 +2,150 @@
 # Simple Library Manager (Python 3.9+)
 # Run: python main.py
 
+import heapq
 import json
+import mmap
+import os
+import sys
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # optional, much faster JSON encode/decode
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 DATA_FILE = "library_data.json"
+TRANSACTIONS_FILE = "transactions.log"  # one JSON transaction per line, append-only
+
+def _indent(level: int, pretty: bool) -> bytes:
+    # line break + indentation before something at this depth; nothing when compact
+    return b"\n" + b"  " * level if pretty else b""
+
+def _dumps(obj: Any, level: int = 0, pretty: bool = False) -> bytes:
+    # level = how deep obj sits in the document, so nested pretty output lines up
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        out = orjson.dumps(obj, option=option)
+    elif pretty:
+        out = json.dumps(obj, indent=2).encode("utf-8")
+    else:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    if pretty and level:
+        out = out.replace(b"\n", _indent(level, True))
+    return out
+
+def _write_members(f: BinaryIO, brackets: bytes, members: Iterable[bytes], level: int, pretty: bool) -> None:
+    # write a JSON object/array one encoded member at a time
+    # so the whole document never has to sit in memory
+    pad = _indent(level + 1, pretty)
+    sep = brackets[:1]
+    for m in members:
+        f.write(sep + pad + m)
+        sep = b","
+    if sep == b",":
+        f.write(_indent(level, pretty) + brackets[1:])
+    else:
+        f.write(brackets)
+
+def _loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)  # also parses a memoryview in place
+    return json.loads(data)
+
+_utc_second: Tuple[int, str] = (-1, "")  # last whole second seen, and its isoformat()
+
+def _utc_timestamp() -> str:
+    # same text as datetime.utcnow().isoformat(), but the date/time part
+    # is only formatted once per second
+    global _utc_second
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    if sec != _utc_second[0]:
+        _utc_second = (sec, datetime.utcfromtimestamp(sec).isoformat())
+    us = ns // 1000
+    return f"{_utc_second[1]}.{us:06d}" if us else _utc_second[1]
+
+def _due_ordinal(due: str) -> int:
+    # due dates are always written by date.isoformat(), so no fallback parsing
+    return date.fromisoformat(due).toordinal()
+
+class _BookColumns:
+    # numeric Book fields kept column-wise (one row per book) so totals
+    # and rankings scan flat columns instead of every Book object
+    __slots__ = ("quantity", "issued_count", "free_rows")
+
+    def __init__(self) -> None:
+        # 64-bit C int columns: 8 bytes per value instead of a full int object
+        self.quantity = array("q")
+        self.issued_count = array("q")
+        self.free_rows: List[int] = []
+
+    def add_row(self, quantity: int, issued_count: int) -> int:
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.quantity[row] = quantity
+            self.issued_count[row] = issued_count
+        else:
+            row = len(self.quantity)
+            self.quantity.append(quantity)
+            self.issued_count.append(issued_count)
+        return row
+
+    def free_row(self, row: int) -> None:
+        # zero it so column sums stay correct until the row is reused
+        self.quantity[row] = 0
+        self.issued_count[row] = 0
+        self.free_rows.append(row)
+
+# shared rows for Books that no Library owns (built standalone or removed),
+# so a loose Book costs one row rather than columns of its own
+_LOOSE_COLUMNS = _BookColumns()
 
 class Book:
-    def __init__(self, title: str, author: str, genre: str, quantity: int):
+    __slots__ = ("title", "author", "genre", "_cols", "_row")
+
+    def __init__(self, title: str, author: str, genre: str, quantity: int,
+                 columns: Optional[_BookColumns] = None):
         self.title = title
         self.author = author
         self.genre = genre
-        self.quantity = quantity
-        self.issued_count = 0  # times issued, for popularity
+        self._cols = columns if columns is not None else _LOOSE_COLUMNS
+        self._row = self._cols.add_row(quantity, 0)
+
+    def __del__(self) -> None:
+        # Library columns are dropped or freed as a whole; loose rows are not
+        if self._cols is _LOOSE_COLUMNS:
+            _LOOSE_COLUMNS.free_row(self._row)
+
+    @property
+    def quantity(self) -> int:
+        return self._cols.quantity[self._row]
+
+    @quantity.setter
+    def quantity(self, value: int) -> None:
+        self._cols.quantity[self._row] = value
 
-    def to_dict(self):
+    @property
+    def issued_count(self) -> int:
+        # times issued, for popularity
+        return self._cols.issued_count[self._row]
+
+    @issued_count.setter
+    def issued_count(self, value: int) -> None:
+        self._cols.issued_count[self._row] = value
+
+    def _detach(self) -> None:
+        # move this book's numbers to a loose row so its old row
+        # can be reused without aliasing another book
+        row = _LOOSE_COLUMNS.add_row(self.quantity, self.issued_count)
+        self._cols.free_row(self._row)
+        self._cols = _LOOSE_COLUMNS
+        self._row = row
+
+    def to_dict(self) -> Dict[str, Any]:
         return {
             "title": self.title,
             "author": self.author,
@@ -27,158 +155,267 @@ class Book:
         }
 
     @staticmethod
-    def from_dict(d):
-        b = Book(d["title"], d["author"], d["genre"], d["quantity"])
-        b.issued_count = d.get("issued_count", 0)
+    def from_dict(d: Dict[str, Any], columns: Optional[_BookColumns] = None) -> "Book":
+        # intern repeated strings so every reference shares one object
+        b = Book(sys.intern(d["title"]), sys.intern(d["author"]), sys.intern(d["genre"]), int(d["quantity"]), columns)
+        b.issued_count = int(d.get("issued_count", 0))
         return b
 
 class User:
-    def __init__(self, name: str, contact: str):
-        self.id = str(uuid.uuid4())
+    __slots__ = ("id", "name", "contact", "borrowed")
+
+    def __init__(self, name: str, contact: str, id: Optional[str] = None):
+        # only new users need a uuid4 (an os.urandom call); loaded ones pass theirs
+        self.id = id if id is not None else str(uuid.uuid4())
         self.name = name
         self.contact = contact
-        self.borrowed = {}  # title -> due_date (ISO)
+        self.borrowed: Dict[str, int] = {}  # title -> due date as date.toordinal()
+
+    def due_dates(self) -> Dict[str, str]:
+        return {t: date.fromordinal(due).isoformat() for t, due in self.borrowed.items()}
 
-    def to_dict(self):
+    def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
             "name": self.name,
             "contact": self.contact,
-            "borrowed": self.borrowed
+            "borrowed": self.due_dates()
         }
 
     @staticmethod
-    def from_dict(d):
-        u = User(d["name"], d["contact"])
-        u.id = d["id"]
-        u.borrowed = d.get("borrowed", {})
+    def from_dict(d: Dict[str, Any]) -> "User":
+        u = User(d["name"], d["contact"], sys.intern(d["id"]))
+        u.borrowed = {sys.intern(t): _due_ordinal(due) for t, due in d.get("borrowed", {}).items()}
         return u
 
 class Transaction:
+    __slots__ = ("user_id", "book_title", "action", "date")
+
     def __init__(self, user_id: str, book_title: str, action: str, date: Optional[str]=None):
         self.user_id = user_id
         self.book_title = book_title
         self.action = action  # "issue" or "return"
-        self.date = date or datetime.utcnow().isoformat()
+        self.date = date or _utc_timestamp()
 
-    def to_dict(self):
+    def to_dict(self) -> Dict[str, Any]:
         return {"user_id": self.user_id, "book_title": self.book_title, "action": self.action, "date": self.date}
 
     @staticmethod
-    def from_dict(d):
-        t = Transaction(d["user_id"], d["book_title"], d["action"], d.get("date"))
+    def from_dict(d: Dict[str, Any]) -> "Transaction":
+        t = Transaction(sys.intern(d["user_id"]), sys.intern(d["book_title"]), sys.intern(d["action"]), d.get("date"))
         return t
 
 class Library:
-    def __init__(self):
+    def __init__(self, transactions_file: str = TRANSACTIONS_FILE) -> None:
         self.books: Dict[str, Book] = {}  # title -> Book
+        self._columns = _BookColumns()  # quantity/issued_count of self.books
         self.users: Dict[str, User] = {}  # id -> User
-        self.transactions: List[Transaction] = []
+        # transactions go straight to disk instead of piling up in memory
+        self.transactions_file = transactions_file
+        self._log: Optional[BinaryIO] = None  # opened on first write
+        # file that already matches what is in memory; any change resets it
+        self._synced_with: Optional[str] = None
+        # (due, user_id, title) min-heap of loans; entries for returned books
+        # stay in until popped or compacted (lazy deletion)
+        self._due_heap: List[Tuple[int, str, str]] = []
+        self._stale_loans = 0
+        # loans already popped off the heap as overdue, in due order
+        self._overdue: Dict[Tuple[int, str, str], None] = {}
+
+    def _index_loans(self) -> None:
+        self._due_heap = [(due, uid, t) for uid, u in self.users.items() for t, due in u.borrowed.items()]
+        heapq.heapify(self._due_heap)
+        self._stale_loans = 0
+
+    def _loan_active(self, loan: Tuple[int, str, str]) -> bool:
+        due, user_id, title = loan
+        user = self.users.get(user_id)
+        return user is not None and user.borrowed.get(title) == due
+
+    def _loan_closed(self, count: int = 1) -> None:
+        self._stale_loans += count
+        if self._stale_loans > len(self._due_heap) // 2:
+            # filter the heap itself: rebuilding from every user would cost
+            # O(users) per compaction even when only a few loans are open
+            self._due_heap = [loan for loan in self._due_heap if self._loan_active(loan)]
+            heapq.heapify(self._due_heap)
+            self._stale_loans = 0
 
-    def add_book(self, title, author, genre, quantity):
-        if title in self.books:
-            self.books[title].quantity += quantity
+    def _record(self, t: Transaction) -> None:
+        if self._log is None:
+            self._log = open(self.transactions_file, "ab")
+        self._log.write(_dumps(t.to_dict()) + b"\n")
+        # flushed per record on purpose: a crash must not lose loan history
+        self._log.flush()
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        try:
+            with open(self.transactions_file, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield Transaction.from_dict(_loads(line))
+        except FileNotFoundError:
+            return
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self) -> "Library":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def add_book(self, title: str, author: str, genre: str, quantity: int) -> None:
+        self._synced_with = None
+        book = self.books.get(title)
+        if book is not None:
+            book.quantity += quantity
         else:
-            self.books[title] = Book(title, author, genre, quantity)
+            self.books[title] = Book(title, author, genre, quantity, self._columns)
 
-    def remove_book(self, title):
-        if title in self.books:
-            del self.books[title]
+    def remove_book(self, title: str) -> bool:
+        book = self.books.pop(title, None)
+        if book is not None:
+            book._detach()
+            self._synced_with = None
             return True
         return False
 
-    def add_user(self, name, contact):
+    def add_user(self, name: str, contact: str) -> str:
         u = User(name, contact)
         self.users[u.id] = u
+        self._synced_with = None
         return u.id
 
-    def remove_user(self, user_id):
-        if user_id in self.users:
-            del self.users[user_id]
+    def remove_user(self, user_id: str) -> bool:
+        user = self.users.pop(user_id, None)
+        if user is not None:
+            self._loan_closed(len(user.borrowed))
+            self._synced_with = None
             return True
         return False
 
-    def issue_book(self, user_id, title):
-        if user_id not in self.users:
+    def issue_book(self, user_id: str, title: str) -> Tuple[bool, str]:
+        user = self.users.get(user_id)
+        if user is None:
             return False, "User not found"
-        if title not in self.books:
+        book = self.books.get(title)
+        if book is None:
             return False, "Book not found"
-        book = self.books[title]
         if book.quantity <= 0:
             return False, "No copies available"
-        user = self.users[user_id]
+        self._synced_with = None
         # issue for 14 days
-        due = (datetime.utcnow() + timedelta(days=14)).date().isoformat()
-        user.borrowed[title] = due
+        due = (datetime.utcnow() + timedelta(days=14)).date()
+        due_ord = due.toordinal()
+        user.borrowed[title] = due_ord
+        heapq.heappush(self._due_heap, (due_ord, user_id, title))
         book.quantity -= 1
         book.issued_count += 1
-        t = Transaction(user_id, title, "issue")
-        self.transactions.append(t)
-        return True, f"Issued. Due: {due}"
+        self._record(Transaction(user_id, title, "issue"))
+        return True, f"Issued. Due: {due.isoformat()}"
 
-    def return_book(self, user_id, title):
-        if user_id not in self.users:
+    def return_book(self, user_id: str, title: str) -> Tuple[bool, str]:
+        user = self.users.get(user_id)
+        if user is None:
             return False, "User not found"
-        user = self.users[user_id]
-        if title not in user.borrowed:
+        if user.borrowed.pop(title, None) is None:
             return False, "User did not borrow this book"
-        del user.borrowed[title]
-        if title in self.books:
-            self.books[title].quantity += 1
+        self._synced_with = None
+        self._loan_closed()
+        book = self.books.get(title)
+        if book is not None:
+            book.quantity += 1
         else:
             # book was removed from catalog; re-add with 1 copy
-            self.books[title] = Book(title, "Unknown", "Unknown", 1)
-        t = Transaction(user_id, title, "return")
-        self.transactions.append(t)
+            self.books[title] = Book(title, "Unknown", "Unknown", 1, self._columns)
+        self._record(Transaction(user_id, title, "return"))
         return True, "Returned"
 
-    def generate_report(self):
-        report = {}
-        report["total_books"] = sum(b.quantity for b in self.books.values())
+    def generate_report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {}
+        report["total_books"] = sum(self._columns.quantity)
         report["unique_titles"] = len(self.books)
         report["total_users"] = len(self.users)
         # popular books
-        popular = sorted(self.books.values(), key=lambda b: b.issued_count, reverse=True)[:10]
+        popular = heapq.nlargest(10, self.books.values(), key=lambda b: b.issued_count)
         report["popular"] = [b.to_dict() for b in popular]
         # overdue users
-        overdue = []
-        today = datetime.utcnow().date()
-        for u in self.users.values():
-            for title, due in u.borrowed.items():
-                try:
-                    due_date = datetime.fromisoformat(due).date()
-                except Exception:
-                    due_date = datetime.strptime(due, "%Y-%m-%d").date()
-                if due_date < today:
-                    overdue.append({"user_id": u.id, "name": u.name, "book": title, "due": due})
-        report["overdue"] = overdue
+        today = datetime.utcnow().date().toordinal()
+        while self._due_heap and self._due_heap[0][0] < today:
+            self._overdue[heapq.heappop(self._due_heap)] = None
+        self._overdue = {loan: None for loan in self._overdue if self._loan_active(loan)}
+        report["overdue"] = [{"user_id": uid, "name": self.users[uid].name, "book": title,
+                              "due": date.fromordinal(due).isoformat()}
+                             for due, uid, title in self._overdue]
         return report
 
-    def save_to_file(self, filename=DATA_FILE):
-        data = {
-            "books": {t: b.to_dict() for t, b in self.books.items()},
-            "users": {uid: u.to_dict() for uid, u in self.users.items()},
-            "transactions": [tr.to_dict() for tr in self.transactions]
-        }
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    def save_to_file(self, filename: str = DATA_FILE, pretty: bool = False) -> bool:
+        # compact by default; pretty=True writes the indented, human-readable form
+        if not pretty and filename == self._synced_with and os.path.exists(filename):
+            return True  # nothing changed since the last save/load
+        # write and fsync a temp file, then swap it in, so a crash or power loss
+        # never leaves a half-written file
+        tmp = filename + ".tmp"
+        colon = b": " if pretty else b":"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b"{" + _indent(1, pretty) + b'"books"' + colon)
+                _write_members(f, b"{}", (_dumps(t) + colon + _dumps(b.to_dict(), 2, pretty)
+                                          for t, b in self.books.items()), 1, pretty)
+                f.write(b"," + _indent(1, pretty) + b'"users"' + colon)
+                _write_members(f, b"{}", (_dumps(uid) + colon + _dumps(u.to_dict(), 2, pretty)
+                                          for uid, u in self.users.items()), 1, pretty)
+                f.write(_indent(0, pretty) + b"}")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, filename)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._synced_with = filename
         return True
 
-    def load_from_file(self, filename=DATA_FILE):
+    def load_from_file(self, filename: str = DATA_FILE) -> bool:
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.books = {t: Book.from_dict(b) for t, b in data.get("books", {}).items()}
-            self.users = {uid: User.from_dict(u) for uid, u in data.get("users", {}).items()}
-            self.transactions = [Transaction.from_dict(t) for t in data.get("transactions", [])]
+            with open(filename, "rb") as f:
+                if orjson is None or os.fstat(f.fileno()).st_size == 0:
+                    # stdlib json needs bytes anyway, and mmap can't map an empty file
+                    data = _loads(f.read())
+                else:
+                    # map the file instead of copying it into a bytes buffer
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                        data = _loads(view)
+            # build everything first so a bad record leaves the library untouched
+            columns = _BookColumns()
+            books = {sys.intern(t): Book.from_dict(b, columns) for t, b in data.get("books", {}).items()}
+            users = {sys.intern(uid): User.from_dict(u) for uid, u in data.get("users", {}).items()}
+            legacy = [Transaction.from_dict(t) for t in data.get("transactions", [])]
+            self._columns = columns
+            self.books = books
+            self.users = users
+            if legacy:
+                # older data files kept the history inline; append whatever the log
+                # doesn't hold yet, so it survives the next save
+                logged = {(t.user_id, t.book_title, t.action, t.date) for t in self.iter_transactions()}
+                for t in legacy:
+                    if (t.user_id, t.book_title, t.action, t.date) not in logged:
+                        self._record(t)
+            self._index_loans()
+            self._overdue = {}
+            self._synced_with = filename
             return True
         except FileNotFoundError:
             return False
 
-def prompt(s):
+def prompt(s: str) -> str:
     return input(s).strip()
 
-def main_menu():
+def main_menu() -> None:
     lib = Library()
     lib.load_from_file()
     while True:
@@ -225,12 +462,13 @@ def main_menu():
             ok, msg = lib.return_book(uid, title)
             print(msg)
         elif cmd == "7":
-            print("Books:")
-            for b in lib.books.values():
-                print(f" - {b.title} by {b.author} [{b.quantity} copies] (issued {b.issued_count} times)")
-            print("Users:")
-            for u in lib.users.values():
-                print(f" - {u.id} {u.name} borrowed: {u.borrowed}")
+            # build the listing once and write it in one go instead of a print per line
+            lines = ["Books:"]
+            lines.extend(f" - {b.title} by {b.author} [{b.quantity} copies] (issued {b.issued_count} times)"
+                         for b in lib.books.values())
+            lines.append("Users:")
+            lines.extend(f" - {u.id} {u.name} borrowed: {u.due_dates()}" for u in lib.users.values())
+            sys.stdout.write("\n".join(lines) + "\n")
         elif cmd == "8":
             lib.save_to_file()
             print("Saved.")
@@ -239,6 +477,7 @@ def main_menu():
             print("Loaded." if ok else "No data file.")
         elif cmd == "0":
             print("Goodbye.")
+            lib.close()
             break
         else:
             print("Unknown option.")